@@ -18,5 +18,5 @@
 
 # <pep8 compliant>
 
-from .fbx import load_fbx
+from .fbx import load_fbx, prefetch_file
 from .path_ops import *
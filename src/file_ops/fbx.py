@@ -18,15 +18,28 @@
 
 # <pep8 compliant>
 
-from pathlib import Path
-from typing import (List,
-                    Union,
-                    )
+from typing import List
 
-try:
-    from io_scene_fbx import import_fbx  # Usually comes with Blender.
-except ModuleNotFoundError:
-    pass  # ToDo: Handle io_scene_fbx not present.
+# Blender's FBX importer module, imported on first use.
+_import_fbx = None
+# Size of the blocks read when prefetching files.
+PREFETCH_CHUNK_SIZE = 1 << 20
+
+
+def _get_import_fbx():
+    """Import Blender's FBX importer module once it's actually needed.
+
+    :return: The import_fbx module, or None if the FBX add-on is not present.
+    :rtype: Optional[module]
+    """
+    global _import_fbx
+    if _import_fbx is None:
+        try:
+            from io_scene_fbx import import_fbx  # Usually comes with Blender.
+        except ModuleNotFoundError:
+            return None
+        _import_fbx = import_fbx
+    return _import_fbx
 
 
 class DummyOperator():
@@ -37,28 +50,57 @@ class DummyOperator():
 
     def report(self, type, message):
         """Catch messages instead of reporting them."""
-        self.messages.append((type.pop(), message))
+        # Don't alter the caller's set of report types.
+        self.messages.append((next(iter(type)), message))
+
+    def clear(self):
+        """Discard caught messages."""
+        self.messages.clear()
+
+
+# Reused for every import, so we don't allocate a new operator stand-in per file.
+_message_sink = DummyOperator()
 
 
-def load_fbx(context, file_path: Union[Path, str], **keywords) -> List[tuple]:
+def load_fbx(context, file_path: str, **keywords) -> List[tuple]:
     """Import FBX file.
 
     It's discouraged to call operators from scripts. Use low-level API instead.
 
     :param context: Blender's context.
     :type context: bpy.types.Context
-    :param file_path: Path to FBX file.
-    :type file_path: Union[Path, str]
+    :param file_path: Path to FBX file. Convert Path objects before calling this in a loop.
+    :type file_path: str
     :return: Any error messages raised by the FBX import.
     :rtype: List[tuple]
     """
-    file_path = keywords.pop('filepath', file_path)
-    if isinstance(file_path, Path):
-        file_path = str(file_path)
+    if keywords:  # Usually empty. A 'filepath' keyword has to be removed, or it would be passed twice.
+        file_path = keywords.pop('filepath', file_path)
 
-    dummy_op = DummyOperator()
+    import_fbx = _get_import_fbx()
+    if import_fbx is None:
+        return [('ERROR', "FBX format add-on is not available.")]
+
+    _message_sink.clear()
     try:
-        import_fbx.load(dummy_op, context, filepath=file_path, **keywords)  # Either {'FINISHED'} or {'CANCELLED'}.
+        import_fbx.load(_message_sink, context, filepath=file_path, **keywords)  # Either {'FINISHED'} or {'CANCELLED'}.
     except IOError:
-        dummy_op.messages.append(('ERROR', f"Failed to load file: {file_path}"))
-    return dummy_op.messages
+        _message_sink.messages.append(('ERROR', f"Failed to load file: {file_path}"))
+    return _message_sink.messages[:]
+
+
+def prefetch_file(file_path: str) -> None:
+    """Read a file without keeping its content, so that the operating system caches it for a following import.
+
+    Meant to run in a background thread, it doesn't touch any Blender data. Errors are ignored,
+    the actual import will report them.
+
+    :param file_path: Path to the file to read.
+    :type file_path: str
+    """
+    try:
+        with open(file_path, 'rb') as f:
+            while f.read(PREFETCH_CHUNK_SIZE):
+                pass
+    except OSError:
+        pass
@@ -18,12 +18,19 @@
 
 # <pep8 compliant>
 
+import fnmatch
+import functools
 import itertools
+import os
 import re
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import (Dict,
+                    Iterator,
                     List,
                     Optional,
+                    Tuple,
                     Union,
                     )
 
@@ -31,6 +38,21 @@ import bpy
 
 from .. import Tags
 
+# Maximum number of threads for scanning folders.
+MAX_SCAN_WORKERS = 8
+
+# Tags in the order they appear in names, and the defaults for missing tags (except for the map-tag of images).
+_TAGS = tuple(Tags)
+_TAG_DEFAULTS = ("undefined",  # Type.
+                 "x",  # Skeleton.
+                 "generic",  # Theme.
+                 "01",  # Variant, i.e. map set.
+                 "v1",  # Mesh variant?
+                 "undefined",  # Region.
+                 )
+# Parsed tag values accessible by tag name. The map-tag is optional.
+ParsedName = namedtuple("ParsedName", [tag.value for tag in _TAGS], defaults=(None,))
+
 
 def get_abs_path(path: Union[str, Path]) -> Path:
     """Get absolute path. Handles Blender's special path '//'.
@@ -40,9 +62,23 @@ def get_abs_path(path: Union[str, Path]) -> Path:
     :return: Absolute path.
     :rtype: Path
     """
+    # Normalize without resolving symlinks. Path.resolve() stats every component of the path.
     if isinstance(path, Path):
-        return path.resolve()
-    return Path(bpy.path.abspath(path)).resolve()
+        return Path(os.path.abspath(path))
+    # Blender's relative paths depend on the location of the blend-file, so it's part of the cache key.
+    return _get_abs_path(path, bpy.data.filepath)
+
+
+@functools.lru_cache(maxsize=64)
+def _get_abs_path(path: str, blend_filepath: str) -> Path:
+    """Cached conversion of a string path to an absolute path, relative to the given blend-file's location."""
+    return Path(os.path.abspath(bpy.path.abspath(path)))
+
+
+@bpy.app.handlers.persistent
+def clear_path_cache(*args):
+    """Forget cached path conversions, e.g. when another blend-file is loaded."""
+    _get_abs_path.cache_clear()
 
 
 def get_subfolders(parent_path: Union[Path, str]) -> List[str]:
@@ -55,22 +91,75 @@ def get_subfolders(parent_path: Union[Path, str]) -> List[str]:
     """
     parent_path = get_abs_path(parent_path)
     # Do not include any hidden folders, usually indicated by starting with ".".
-    subfolders = [f.name.lower() for f in parent_path.glob("*/") if f.is_dir() and not f.name.startswith(".")]
+    with os.scandir(str(parent_path)) as entries:
+        subfolders = [e.name.lower() for e in entries if e.is_dir(follow_symlinks=False) and not e.name.startswith(".")]
     return subfolders
 
 
-def get_filepaths(parent_path: Union[Path, str], ext: str = "fbx") -> List[Path]:
-    """Search for files in a given folder and return their paths.
+def iter_filepaths(parent_path: Union[Path, str], ext: str = "fbx") -> Iterator[str]:
+    """Search for files in a given folder and yield their absolute paths as strings.
+
+    Subfolders of the given folder are scanned in parallel.
 
     :param parent_path: Root folder in which to recursively look for files.
     :type parent_path: Union[Path, str]
-    :param ext: File extension of files to gather, defaults to "fbx".
+    :param ext: File extension of files to gather, with or without leading dot, case-insensitive, defaults to "fbx".
     :type ext: str, optional
-    :return: File paths.
-    :rtype: List[Path]
+    :yield: File paths.
+    :rtype: Iterator[str]
     """
     parent_path = get_abs_path(parent_path)
-    return list(parent_path.glob(f"**/**/*.{ext}"))
+    suffix = "." + ext.lstrip(".").lower()  # Accept "fbx" as well as ".fbx".
+    subfolders = []
+    yield from _scan_files([str(parent_path)], suffix, subfolders=subfolders)
+    if not subfolders:
+        return
+    # Scanning is I/O-bound and threads release the GIL while they wait for the file system.
+    with ThreadPoolExecutor(max_workers=min(MAX_SCAN_WORKERS, len(subfolders))) as executor:
+        for file_paths in executor.map(_walk_files, subfolders, itertools.repeat(suffix)):
+            yield from file_paths
+
+
+def has_files(parent_path: Union[Path, str], ext: str = "fbx") -> bool:
+    """Check whether a given folder contains any file with the given extension, including subfolders.
+
+    :param parent_path: Root folder in which to recursively look for files.
+    :type parent_path: Union[Path, str]
+    :param ext: File extension of files to look for, with or without leading dot, case-insensitive, defaults to "fbx".
+    :type ext: str, optional
+    :return: Whether a file was found.
+    :rtype: bool
+    """
+    suffix = "." + ext.lstrip(".").lower()
+    # Stop at the first match instead of gathering all file paths.
+    return next(_scan_files([str(get_abs_path(parent_path))], suffix), None) is not None
+
+
+def _walk_files(folder: str, suffix: str) -> List[str]:
+    """Recursively gather paths of files ending with the lower-case suffix."""
+    return list(_scan_files([folder], suffix))
+
+
+def _scan_files(stack: List[str], suffix: str, subfolders: Optional[List[str]] = None) -> Iterator[str]:
+    """Yield paths of files ending with the lower-case suffix in the folders on the stack.
+
+    Subfolders are walked as well, unless a list is given to collect them in instead.
+    Folders that can't be read are skipped, like os.walk does.
+    """
+    if subfolders is None:
+        subfolders = stack
+    # Walk the tree with os.scandir, which reuses the file type from the directory listing instead of stat'ing.
+    while stack:
+        try:
+            entries = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    subfolders.append(entry.path)
+                elif entry.name.lower().endswith(suffix):
+                    yield entry.path
 
 
 def parse_file_name(file_name: str, sep: str = "-", is_image: bool = False) -> Dict:
@@ -89,21 +178,36 @@ def parse_file_name(file_name: str, sep: str = "-", is_image: bool = False) -> D
     :return: Mapping of tags to values found in the file name.
     :rtype: Dict
     """
+    # Callers are free to alter the mapping, so hand out a new dictionary from the cached result.
+    return {tag: value for tag, value in zip(_TAGS, parse_name(file_name, sep, is_image)) if value is not None}
+
+
+@functools.lru_cache(maxsize=4096)
+def parse_name(file_name: str, sep: str = "-", is_image: bool = False) -> "ParsedName":
+    """Extract parts of a file name as an immutable tuple of tag values in the order of Tags.
+
+    Same rules as parse_file_name, but avoids building a dictionary for read-only callers.
+    The map-tag is None if the name has none and is not an image.
+
+    :param file_name: File name, with or without its extension.
+    :type file_name: str
+    :param sep: Character that seperates tags in the name.
+    :types sep: str
+    :param is_image: Whether the file is an image and has the map-tag.
+    :type is_image: bool, optional
+    :return: Tag values found in the file name, accessible by tag name, e.g. parsed.skeleton.
+    :rtype: ParsedName
+    """
     # e.g.: "outfit-f-casual-01-v2-bottom.fbx" versus "fullbody-f-set-01.fbx".
-    parts = file_name.lower().split(".")[0].split(sep)
-    # Map file name parts to the tags.
-    props = dict(zip(Tags, parts))
+    # Tags beyond the known ones are dropped, so stop splitting there.
+    parts = file_name.lower().partition(".")[0].split(sep, len(_TAGS))[:len(_TAGS)]
     # Set defaults if a tag is missing.
-    props.setdefault(Tags.TYPE, "undefined")
-    props.setdefault(Tags.SKELETON, "x")
-    props.setdefault(Tags.THEME, "generic")
-    props.setdefault(Tags.VARIANT, "01")  # Map set.
-    props.setdefault(Tags.MESH, "v1")  # Mesh variant?
-    props.setdefault(Tags.REGION, "undefined")
+    parts += _TAG_DEFAULTS[len(parts):]
     if is_image:
-        props.setdefault(Tags.MAP, "D")  # Diffuse/Albedo map is most likely.
-        props[Tags.MAP] = props[Tags.MAP].upper()
-    return props
+        if len(parts) < len(_TAGS):
+            parts.append("D")  # Diffuse/Albedo map is most likely.
+        parts[-1] = parts[-1].upper()
+    return ParsedName(*parts)
 
 
 def tags_to_name(tags: Dict, sep: str = "-") -> str:
@@ -116,7 +220,7 @@ def tags_to_name(tags: Dict, sep: str = "-") -> str:
     :return: Descriptor based on tags.
     :rtype: str
     """
-    return sep.join((tags[t] for t in Tags if t in tags))
+    return sep.join([tags[t] for t in _TAGS if t in tags])
 
 
 def replace_name_variant(name: str, variant: str) -> str:
@@ -137,6 +241,20 @@ def replace_name_variant(name: str, variant: str) -> str:
     return tags_to_name(props)
 
 
+def remove_name_variant(name: str) -> str:
+    """Remove the variant from the name, e.g. for naming data that's shared by all variants.
+
+    :param name: Old name.
+    :type name: str
+    :return: New name without the variant.
+    :rtype: str
+    """
+    props = parse_file_name(name)
+    del props[Tags.VARIANT]
+    return tags_to_name(props)
+
+
+@functools.lru_cache(maxsize=4096)
 def get_skeleton_type(file_name: str) -> str:
     """Extract skeleton/armature type from file name.
 
@@ -145,11 +263,38 @@ def get_skeleton_type(file_name: str) -> str:
     :return: Designation of the skeleton type.
     :rtype: str
     """
-    try:
-        skeleton_type = parse_file_name(file_name)[Tags.SKELETON]
-    except KeyError:
-        return ""
-    return skeleton_type
+    return parse_name(file_name).skeleton
+
+
+def iter_img_variants(img_name: str, path: Path) -> Iterator[Tuple[str, Path]]:
+    """Find files like this with another variant tag or map-type, including the given image itself.
+
+    :param img_name: Image name to base search on. Must follow naming convention
+    <type>-<skeleton>-<theme>-<variant>-<mesh>-<region>-<map>.ext, e.g. outfit-f-casual-01-v2-bottom-R.jpg.
+    :type img_name: str
+    :param path: Folder path to inspect for images.
+    :type path: Path
+    :yield: Pairs of variant tag and image path.
+    :rtype: Iterator[Tuple[str, Path]]
+    """
+    # Gather tags from name to form a pattern to look for.
+    p = parse_name(img_name, is_image=True)  # Note: If img_name does not follow convention, this alters the tags.
+    regex = _variant_regex(p.type, p.skeleton, p.theme, p.mesh, p.region)
+    # The pattern fixes the tags in front of the variant, so the variant always starts at the same position.
+    offset = len(p.type) + len(p.skeleton) + len(p.theme) + 3
+    with os.scandir(str(path)) as entries:
+        for entry in entries:
+            if regex.match(entry.name) and entry.is_file():
+                name = entry.name
+                yield name[offset:name.find("-", offset)].lower(), Path(entry.path)
+
+
+@functools.lru_cache(maxsize=256)
+def _variant_regex(type_: str, skeleton: str, theme: str, mesh: str, region: str) -> "re.Pattern":
+    """Compile a pattern matching image names with any variant and map for the given tags."""
+    # Vary variant and map.
+    pattern = f"{type_}-{skeleton}-{theme}-*-{mesh}-{region}-*.*"
+    return re.compile(fnmatch.translate(pattern), flags=re.IGNORECASE)
 
 
 def get_img_variants(img_name: str, path: Path, exclude_current: bool = False) -> Dict[str, List]:
@@ -165,18 +310,16 @@ def get_img_variants(img_name: str, path: Path, exclude_current: bool = False) -
     :return: Found image paths grouped by the variant.
     :rtype: Dict[str, List]
     """
-    # Gather tags from name to form a pattern to look for.
-    p = parse_file_name(img_name, is_image=True)  # Note: If img_name does not follow convention, this alters the tags.
-    # Vary variant and map.
-    pattern = f"{p[Tags.TYPE]}-{p[Tags.SKELETON]}-{p[Tags.THEME]}-*-{p[Tags.MESH]}-{p[Tags.REGION]}-*.*"
-    variants = path.glob(pattern)  # Includes the current image variant.
-    # Group by variant.
-    groups = itertools.groupby(sorted(variants), lambda x: parse_file_name(x.stem, is_image=True)[Tags.VARIANT])
-    grouped_variants = {key: list(group) for key, group in groups}
+    # Group by variant in a single pass over the folder. Includes the current image variant.
+    grouped_variants = {}
+    for variant, img_path in iter_img_variants(img_name, path):
+        grouped_variants.setdefault(variant, []).append(img_path)
+    # Directory listings come in arbitrary order. Sort, so the same image is picked for a variant on any system.
+    grouped_variants = {variant: sorted(grouped_variants[variant]) for variant in sorted(grouped_variants)}
     # Exclude current variant? We could also be looking for other maps (D, A, E, M, R, O, N) and not exclude.
     if exclude_current:
         try:  # An empty dictionary or an incorrect map type due to violation of conventions lead to KeyErrors.
-            del grouped_variants[p[Tags.VARIANT]]
+            del grouped_variants[parse_name(img_name, is_image=True).variant]
         except KeyError:
             pass
     return grouped_variants
@@ -196,5 +339,16 @@ def find_variant_path(img_name: str, variant_paths: List[Path], variant: str = "
     :return: Path of the variant found, or None if the variant was not found within the paths.
     :rtype: Optional[Path]
     """
-    pattern = replace_name_variant(img_name, variant)
-    return next(filter(lambda path: re.match(pattern, path.stem, flags=re.IGNORECASE), variant_paths), None)
+    # Compile once for all paths instead of looking the pattern up in re's cache for each of them.
+    regex = re.compile(replace_name_variant(img_name, variant), flags=re.IGNORECASE)
+    return next((path for path in variant_paths if regex.match(path.stem)), None)
+
+
+def register():
+    if clear_path_cache not in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.append(clear_path_cache)
+
+
+def unregister():
+    if clear_path_cache in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(clear_path_cache)
@@ -18,6 +18,9 @@
 
 # <pep8 compliant>
 
+import functools
+from typing import List
+
 import bpy
 
 from .scenemanager import (batch_import_components,
@@ -26,6 +29,36 @@ from .scenemanager import (batch_import_components,
                            )
 
 
+@functools.lru_cache(maxsize=1)
+def _gltf_export_idname() -> str:
+    """Type name of the glTF2 export operator. It's derived from the operator's name and never changes."""
+    return bpy.ops.export_scene.gltf.idname()
+
+
+def is_gltf_available() -> bool:
+    """Whether the glTF2 Import-Export add-on is activated."""
+    # Only the name is cached. The add-on may be enabled or disabled at any time.
+    return hasattr(bpy.types, _gltf_export_idname())
+
+
+def report_feedback(operator: bpy.types.Operator, feedback: List[tuple]) -> bool:
+    """Report feedback messages through an operator, with one aggregated report per message type.
+
+    :param operator: Operator to report the messages.
+    :type operator: bpy.types.Operator
+    :param feedback: Pairs of message type and message.
+    :type feedback: List[tuple]
+    :return: Whether there was an error among the messages.
+    :rtype: bool
+    """
+    grouped_msgs = {}
+    for msg_type, msg in feedback:
+        grouped_msgs.setdefault(msg_type, []).append(msg)
+    for msg_type, msgs in grouped_msgs.items():
+        operator.report({msg_type}, "\n".join(msgs))
+    return 'ERROR' in grouped_msgs
+
+
 class ImportAvatarComponents(bpy.types.Operator):
     """Import avatar components from given parent folder path"""
 
@@ -50,9 +83,7 @@ class ImportAvatarComponents(bpy.types.Operator):
                                            self.import_path,
                                            use_new_scene=True,
                                            use_variants=self.use_texture_variants)
-        for msg_type, msg in feedback:
-            self.report({msg_type}, msg)
-
+        report_feedback(self, feedback)
         return {'FINISHED'}
 
     def invoke(self, context, event):
@@ -83,10 +114,8 @@ class CombineAvatarComponents(bpy.types.Operator):
 
     def execute(self, context):
         feedback = add_combinations_to_export(context.scene, self.n_combinations)
-        for msg_type, msg in feedback:
-            self.report({msg_type}, msg)
-            if msg_type == 'ERROR':
-                return {'CANCELLED'}
+        if report_feedback(self, feedback):
+            return {'CANCELLED'}
         return {'FINISHED'}
 
     def invoke(self, context, event):
@@ -110,15 +139,13 @@ class ExportAvatarCombinations(bpy.types.Operator):
 
     def execute(self, context):
         # Is glTF2 add-on activated?
-        if not hasattr(bpy.types, bpy.ops.export_scene.gltf.idname()):
+        if not is_gltf_available():
             self.report({'ERROR'}, "glTF2 Import-Export Add-on needs to be activated.")
             return {'CANCELLED'}
 
         feedback = export_combinations(context, self.export_path)
-        for msg_type, msg in feedback:
-            self.report({msg_type}, msg)
-            if msg_type == 'ERROR':
-                return {'CANCELLED'}
+        if report_feedback(self, feedback):
+            return {'CANCELLED'}
         return {'FINISHED'}
 
     def invoke(self, context, event):
@@ -166,31 +193,25 @@ class AutoImportExportAvatars(bpy.types.Operator):
     def execute(self, context):
         # Check Import-Export add-on availability before we take any action.
         # Is glTF2 add-on activated?
-        if not hasattr(bpy.types, bpy.ops.export_scene.gltf.idname()):
+        if not is_gltf_available():
             self.report({'ERROR'}, "glTF2 Import-Export Add-on needs to be activated.")
             return {'CANCELLED'}
 
         try:
             # Import.
             feedback = batch_import_components(context, self.import_path, use_new_scene=True)
-            for msg_type, msg in feedback:
-                self.report({msg_type}, msg)
-                if msg_type == 'ERROR':
-                    return {'CANCELLED'}
+            if report_feedback(self, feedback):
+                return {'CANCELLED'}
 
             # Combine components.
             feedback = add_combinations_to_export(context.scene, self.n_combinations)
-            for msg_type, msg in feedback:
-                self.report({msg_type}, msg)
-                if msg_type == 'ERROR':
-                    return {'CANCELLED'}
+            if report_feedback(self, feedback):
+                return {'CANCELLED'}
 
             # Export.
             feedback = export_combinations(context, self.export_path)
-            for msg_type, msg in feedback:
-                self.report({msg_type}, msg)
-                if msg_type == 'ERROR':
-                    return {'CANCELLED'}
+            if report_feedback(self, feedback):
+                return {'CANCELLED'}
 
         except RuntimeError as e:
             self.report({'ERROR'}, str(e))
@@ -18,14 +18,20 @@
 
 # <pep8 compliant>
 
+import functools
 import hashlib
-import itertools
+import os
 import random
+import sys
 from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import (Dict,
+                    Iterable,
+                    Iterator,
                     List,
                     Optional,
+                    Tuple,
                     Union,
                     )
 
@@ -41,13 +47,25 @@ from . import scenesetup as setup
 
 # Create new helper-class to transport messages from functions to operators for displaying them in the GUI.
 Feedback = namedtuple("Feedback", ["type", "msg"])
+# Imported object paired with the category of the collection it goes to.
+ImportedAsset = namedtuple("ImportedAsset", ["obj", "category"])
+
+# Settings shared by all glTF exports of combinations. Only the file path differs.
+GLTF_EXPORT_SETTINGS = {"use_selection": True, "check_existing": False}
+
+# Categories of the initial collections as used in the scene's collection map.
+_SOURCE = str(CollNames.SOURCE)
+_EXPORT = str(CollNames.EXPORT)
+_FAILED = str(CollNames.FAILED)
+_IGNORE = str(CollNames.IGNORE)
+_MANDATORY = str(CollNames.MANDATORY)
 
 
 ###########################################################################################
 # Assets import. ##########################################################################
 ###########################################################################################
 
-def get_import_tags(filepath: str, fallback_category: str = str(CollNames.FAILED)) -> Dict:
+def get_import_tags(filepath: str, fallback_category: str = _FAILED) -> Dict:
     """Extract information from a file's name that's about to be imported.
 
     :param filepath: Path to the import file.
@@ -68,7 +86,7 @@ def get_import_tags(filepath: str, fallback_category: str = str(CollNames.FAILED
 
 def new_armature_name(name_suffix: str = ""):
     # Set armature name to include skeleton type (e.g. "f"/"m") as suffix.
-    return "-".join(("Armature", name_suffix)).strip("-")  # Strip "-" if there's no suffix.
+    return f"Armature-{name_suffix}" if name_suffix else "Armature"
 
 
 def handle_redundant_armature(candidate: Optional[bpy.types.Object],
@@ -76,10 +94,7 @@ def handle_redundant_armature(candidate: Optional[bpy.types.Object],
                               new_name: str = "Armature"):
 
     # Any existing armature will serve as the base for all further imported assets.
-    try:
-        candidate_is_armature = candidate.type == 'ARMATURE'
-    except AttributeError:
-        return armature
+    candidate_is_armature = getattr(candidate, 'type', None) == 'ARMATURE'
 
     if armature and candidate_is_armature:
         # Get rid of redundant armature.
@@ -90,114 +105,182 @@ def handle_redundant_armature(candidate: Optional[bpy.types.Object],
     return armature
 
 
-def link_obj_to_category(scene: bpy.types.Scene,
-                         obj: bpy.types.Object,
-                         category: str,
-                         exclusive: bool = True) -> bool:
-    """Put an object into a collection, and optionally out of any other collection.
+def get_collections(scene: bpy.types.Scene) -> Dict[str, bpy.types.Collection]:
+    """Map the categories in a scene's collection map to their collections.
+
+    Looking up items in the collection_map property is a linear search. Use this mapping in loops instead.
 
     :param scene: Scene with collection map property and respective collections.
     :type scene: bpy.types.Scene
-    :param obj: Object to link to a collection matching the category.
-    :type obj: bpy.types.Object
+    :return: Mapping of collection categories to collections.
+    :rtype: Dict[str, bpy.types.Collection]
+    """
+    return {item.name: item.collection for item in scene.collection_map}
+
+
+def link_obj_to_category(collections: Dict[str, bpy.types.Collection],
+                         objects: Union[bpy.types.Object, Iterable[bpy.types.Object]],
+                         category: str,
+                         exclusive: bool = True) -> bool:
+    """Put objects into a collection, and optionally out of any other collection.
+
+    :param collections: Mapping of collection categories to collections, see get_collections.
+    :type collections: Dict[str, bpy.types.Collection]
+    :param objects: Object(s) to link to a collection matching the category.
+    :type objects: Union[bpy.types.Object, Iterable[bpy.types.Object]]
     :param category: Name of the collection category in the scene's collection_map property.
     The actual name of the collection may differ.
     :type category: str
-    :param exclusive: Whether to link the object exclusively to the given category, defaults to True.
+    :param exclusive: Whether to link the objects exclusively to the given category, defaults to True.
     :type exclusive: bool, optional
     :return: Whether linking was successful.
     :rtype: bool
     """
-    if exclusive and obj:
-        for collection in list(obj.users_collection):
-            collection.objects.unlink(obj)
+    if not isinstance(objects, Iterable):
+        objects = [objects]
     try:
-        scene.collection_map[category].collection.objects.link(obj)
+        target = collections[category]
+        link = target.objects.link
     except (AttributeError, KeyError):
+        target = link = None
+    # Leave objects be where they're already linked to the category. Linking them again would raise an error.
+    unlinked = []
+    for obj in objects:
+        is_linked = False
+        if obj:
+            for collection in list(obj.users_collection):
+                if collection == target:
+                    is_linked = True
+                elif exclusive:
+                    collection.objects.unlink(obj)
+        if not is_linked:
+            unlinked.append(obj)
+    if link is None:
         return False
+    # Blender 2.92 can't defer the depsgraph update of each link, but at least look up the target only once.
+    for obj in unlinked:
+        link(obj)
     return True
 
 
 def sort_objects(scene: bpy.types.Scene, objects: List[bpy.types.Object], categories: List[str]):
     success = True
+    # Group objects by category, so each group is linked to its collection in one go.
+    grouped_objects = {}
     for i, obj in enumerate(objects):
         try:
             category = categories[i]
         except IndexError:
-            category = CollNames.FAILED
+            category = _FAILED
             success = False
-        success &= link_obj_to_category(scene, obj, category)
+        grouped_objects.setdefault(category, []).append(obj)
+
+    collections = get_collections(scene)
+    for category, category_objects in grouped_objects.items():
+        success &= link_obj_to_category(collections, category_objects, category)
     return success
 
 
-def import_files(context) -> List[tuple]:
+def import_files(context) -> Tuple[List[tuple], List[tuple]]:
     """Import files that are listed in the scene's properties and sort them into collection categories.
 
     It's assumed that all files have the same armature as a base. Imported assets will share a single armature.
 
     :param context: Blender's context.
     :type context: bpy.types.Context
-    :return: Error messages.
-    :rtype: List[tuple]
+    :return: Imported objects paired with their category, and error messages.
+    :rtype: Tuple[List[tuple], List[tuple]]
     """
-    feedback = []
-    armature = None
     assets = []
+    feedback = []
+    for item in _import_files_iter(context):
+        if isinstance(item, ImportedAsset):
+            assets.append(item)
+        else:
+            feedback.append(item)
+    return assets, feedback
 
-    for import_file in context.scene.import_files:
-        context.view_layer.objects.active = None
-        ret_msgs = fops.load_fbx(context, file_path=import_file.path, ignore_leaf_bones=True)
-        feedback.extend([Feedback(*msg) for msg in ret_msgs])
-        if 'ERROR' in [msg for msg, _ in ret_msgs]:
-            continue
 
-        # If there are multiple meshes in the imported file, join them. We only expect single components per file.
-        # The imported asset is automatically made active. Expected to be the armature.
-        try:
-            objects = list(context.active_object.children)
-        except AttributeError:  # In case this FBX is empty or animation data only.
-            feedback.append(Feedback(type='WARNING', msg=f"No objects imported from {import_file.path}"))
-            continue
+def _import_files_iter(context) -> Iterator[Union[Feedback, ImportedAsset]]:
+    """Import files listed in the scene's properties and yield feedback and imported assets as they arise.
 
-        obj = objops.join_objects(context, objects)
-        if obj is None:  # No meshes, possibly only an armature.
-            feedback.append(Feedback(type='WARNING', msg=f"Joining meshes has failed for: {import_file.path}"))
-            continue
+    The shared armature is yielded last. The scene's selection is only cleaned up once the iterator is exhausted.
 
-        file_tags = get_import_tags(import_file.path, import_file.category)
-        # In case a new shared armature is set, give it a name.
-        armature_name = new_armature_name(name_suffix=file_tags[Tags.SKELETON])
-        armature = handle_redundant_armature(context.active_object, armature, new_name=armature_name)
-
-        # Save source file property on imported objects.
-        ret = objops.set_object_attributes(obj, import_file.path, fops.tags_to_name(file_tags), MESH_PREFIX, MAT_PREFIX)
-        if not ret:
-            feedback.append(Feedback(type='WARNING', msg=f"Object properties could not be set for: {import_file.path}"))
-
-        # We want everything to be deformed by the same armature.
-        if not objops.set_armature(obj, armature):
-            feedback.append(Feedback(type='WARNING', msg=f"Failed to set shared armature for {obj.name}."))
-            assets.append((obj, str(CollNames.FAILED)))
-        elif armature_name != armature.name:
-            feedback.append(Feedback(type='WARNING', msg=f"Armature mismatch detected for {obj.name}."))
-            assets.append((obj, str(CollNames.FAILED)))
-        elif file_tags[Tags.REGION] != import_file.category:
-            feedback.append(Feedback(type='WARNING', msg=f"Region mismatch detected for {obj.name}."))
-            assets.append((obj, str(CollNames.FAILED)))
-        else:
-            assets.append((obj, import_file.category))
+    :param context: Blender's context.
+    :type context: bpy.types.Context
+    :yield: Feedback messages and imported objects paired with their category.
+    :rtype: Iterator[Union[Feedback, ImportedAsset]]
+    """
+    armature = None
+    # Each property access goes through RNA, read them only once.
+    files = [(import_file.path, import_file.category) for import_file in context.scene.import_files]
+
+    # Read the next file in the background while the current one is imported, so its data is already cached.
+    prefetch = None
+    is_failed = False
+    with ThreadPoolExecutor(max_workers=1) as prefetcher:
+        for i, (file_path, category) in enumerate(files):
+            # Read ahead at most one file. Don't bother while imports fail anyway, e.g. without the FBX add-on.
+            if not is_failed and i + 1 < len(files) and (prefetch is None or prefetch.done()):
+                prefetch = prefetcher.submit(fops.prefetch_file, files[i + 1][0])
+            # Writing the active object tags the view layer for an update, only do it if it's set.
+            if context.view_layer.objects.active is not None:
+                context.view_layer.objects.active = None
+            ret_msgs = fops.load_fbx(context, file_path=file_path, ignore_leaf_bones=True)
+            yield from map(Feedback._make, ret_msgs)
+            is_failed = any(msg_type == 'ERROR' for msg_type, _ in ret_msgs)
+            if is_failed:
+                continue
+
+            # If there are multiple meshes in the imported file, join them. We only expect single components per file.
+            # The imported asset is automatically made active. Expected to be the armature.
+            root = context.active_object
+            if root is None:  # In case this FBX is empty or animation data only.
+                yield Feedback(type='WARNING', msg=f"No objects imported from {file_path}")
+                continue
+            # Unlike the selection, children include objects the importer created hidden.
+            objects = list(root.children)
+
+            obj = objops.join_objects(context, objects)
+            if obj is None:  # No meshes, possibly only an armature.
+                yield Feedback(type='WARNING', msg=f"Joining meshes has failed for: {file_path}")
+                continue
+
+            file_tags = get_import_tags(file_path, category)
+            # In case a new shared armature is set, give it a name.
+            armature_name = new_armature_name(name_suffix=file_tags[Tags.SKELETON])
+            armature = handle_redundant_armature(context.active_object, armature, new_name=armature_name)
+
+            # Save source file property on imported objects.
+            ret = objops.set_object_attributes(obj, file_path, fops.tags_to_name(file_tags), MESH_PREFIX, MAT_PREFIX)
+            if not ret:
+                yield Feedback(type='WARNING', msg=f"Object properties could not be set for: {file_path}")
+
+            # We want everything to be deformed by the same armature.
+            if not objops.set_armature(obj, armature):
+                yield Feedback(type='WARNING', msg=f"Failed to set shared armature for {obj.name}.")
+                yield ImportedAsset(obj, _FAILED)
+            elif armature_name != armature.name:
+                yield Feedback(type='WARNING', msg=f"Armature mismatch detected for {obj.name}.")
+                yield ImportedAsset(obj, _FAILED)
+            elif file_tags[Tags.REGION] != category:
+                yield Feedback(type='WARNING', msg=f"Region mismatch detected for {obj.name}.")
+                yield ImportedAsset(obj, _FAILED)
+            else:
+                yield ImportedAsset(obj, category)
 
     if armature:
-        assets.append((armature, str(CollNames.MANDATORY)))
+        yield ImportedAsset(armature, _MANDATORY)
 
     # Since we deleted the last active object, set a new one (or None).
     context.view_layer.objects.active = armature
     objops.deselect_all()
 
-    return assets, feedback
-
 
-def load_variants(obj: bpy.types.Object) -> List[bpy.types.Object]:
+def load_variants(obj: bpy.types.Object,
+                  variants_cache: Optional[Dict[tuple, Dict]] = None) -> List[bpy.types.Object]:
+    if variants_cache is None:
+        variants_cache = {}
     materials = mops.get_materials(obj)
     mat_variants = {}
     for mat in materials:
@@ -207,7 +290,12 @@ def load_variants(obj: bpy.types.Object) -> List[bpy.types.Object]:
             img1 = img_paths.pop()
         except IndexError:
             continue
-        variant_paths = fops.get_img_variants(img1.stem, img1.parent, exclude_current=True)
+        # Materials of different objects may share images. Scan each image's folder for its variants only once.
+        cache_key = (img1.stem, img1.parent)
+        variant_paths = variants_cache.get(cache_key)
+        if variant_paths is None:
+            variant_paths = fops.get_img_variants(img1.stem, img1.parent, exclude_current=True)
+            variants_cache[cache_key] = variant_paths
 
         for variant, paths in variant_paths.items():
             mat_name = fops.replace_name_variant(mat.name, variant)
@@ -255,12 +343,14 @@ def batch_import_components(context: bpy.types.Context,
         assets, import_errors = import_files(context)
         if use_variants:
             new_assets = []
+            variants_cache = {}
             for obj, category in assets:
-                variants = load_variants(obj)
+                variants = load_variants(obj, variants_cache)
                 new_assets.extend((v, category) for v in variants)
             assets.extend(new_assets)
 
-        objects, categories = zip(*assets)
+        objects = [obj for obj, _ in assets]
+        categories = [category for _, category in assets]
         feedback.extend(import_errors)
         is_all_sorted = sort_objects(context.scene, objects, categories)
         if not is_all_sorted:
@@ -287,27 +377,45 @@ def draw_combinations(scene: bpy.types.Scene, n: int = 10) -> List:
     :return: List of combination lists.
     :rtype: List
     """
+    collections = get_collections(scene)
     try:
-        cat_collection_list = list(scene.collection_map[str(CollNames.SOURCE)].collection.children)
-        # Don't include failed and ignored components in combinations.
-        cat_collection_list.remove(scene.collection_map[str(CollNames.IGNORE)].collection)
-        cat_collection_list.remove(scene.collection_map[str(CollNames.FAILED)].collection)
+        source_children = collections[_SOURCE].children
         # Special case for mandatory assets in each combination.
-        mandatory_collection = scene.collection_map[str(CollNames.MANDATORY)].collection
+        mandatory_collection = collections[_MANDATORY]
+        # Don't include failed and ignored components in combinations.
+        # Leave out the mandatory assets from combinations now and add them to everything later on.
+        excluded = {collections[_IGNORE], collections[_FAILED], mandatory_collection}
     except (AttributeError, KeyError):  # Scene is not setup correctly.
         print("WARNING: Scene is not initialized properly. Abort.")
         return []
 
-    # Remove the mandatory assets from combinations now and add them to everything later on.
-    cat_collection_list.remove(mandatory_collection)
-    asset_lists = [collection.objects for collection in cat_collection_list]
-    product = itertools.product(*asset_lists)
-    # In case some assets are in the mandatory collection as well as in another category, filter out doubles.
-    product = [list(set(list(mandatory_collection.objects) + list(c))) for c in product]
-    # Randomize arrangements and draw some combinations.
+    cat_collection_list = [collection for collection in source_children if collection not in excluded]
+    # Indexing a tuple is much cheaper than indexing the objects property of a collection.
+    asset_lists = [tuple(collection.objects) for collection in cat_collection_list]
+    sizes = [len(assets) for assets in asset_lists]
+    total = 1
+    for size in sizes:
+        total *= size
+    # Draw unique indices into the cartesian product instead of building it. It grows exponentially with categories.
     # This makes sure the combinations are unique and we never draw more than actually exist.
-    random.shuffle(product)
-    return product[:n]
+    if total <= sys.maxsize:
+        indices = random.sample(range(total), min(n, total))
+    else:  # Too large for sampling from a range, but then collisions are very unlikely anyway.
+        indices = set()
+        while len(indices) < n:
+            indices.add(random.randrange(total))
+    mandatory = list(mandatory_collection.objects)
+    combinations = []
+    for index in indices:
+        combination = mandatory[:]
+        # Decode the index into one position per category.
+        for assets, size in zip(asset_lists, sizes):
+            index, position = divmod(index, size)
+            combination.append(assets[position])
+        # In case some assets are in the mandatory collection as well as in another category, filter out doubles.
+        # Keep the order, mandatory objects first, so that equal combinations always come out the same.
+        combinations.append(list(dict.fromkeys(combination)))
+    return combinations
 
 
 def add_combinations_to_export(scene: bpy.types.Scene, n_combinations: int = 10) -> List[tuple]:
@@ -326,14 +434,22 @@ def add_combinations_to_export(scene: bpy.types.Scene, n_combinations: int = 10)
         feedback.append(Feedback(type='ERROR', msg="Combining avatar components failed."))
         return feedback
     try:
-        export_collection = scene.collection_map[str(CollNames.EXPORT)].collection
+        export_collection = get_collections(scene)[_EXPORT]
     except (AttributeError, KeyError):
         feedback.append(Feedback(type='ERROR', msg="Scene is not initialized properly. Missing export collection."))
         return feedback
 
+    # Combinations share most of their objects. Read each object's name only once.
+    names = {obj: obj.name for combination in combinations for obj in combination}
     collections = []
+    seen = set()
     for combination in combinations:
-        collection_name = get_combination_name(combination)
+        # Objects in both the mandatory and another collection can make different draws end up the same.
+        key = frozenset(combination)
+        if key in seen:
+            continue
+        seen.add(key)
+        collection_name = get_combination_name(combination, names)
         if not collection_name:
             continue
         new_collection = setup.objects_to_collection(combination, collection_name)
@@ -342,21 +458,39 @@ def add_combinations_to_export(scene: bpy.types.Scene, n_combinations: int = 10)
     return feedback
 
 
-def get_combination_name(objects: List[bpy.types.Object]) -> str:
+def get_combination_name(objects: List[bpy.types.Object],
+                         names: Optional[Dict[bpy.types.Object, str]] = None) -> str:
     """Create a unqique name based on objects' names.
 
     :param objects: Objects that form a combination.
     :type objects: List[bpy.types.Object]
+    :param names: Already known names of the objects, to spare reading them from each object again.
+    :type names: Dict[bpy.types.Object, str], optional
     :return: Unique name for the given combination of objects.
     :rtype: str
     """
     if not objects:
         return ""
+    if names is None:
+        obj_names = [obj.name for obj in objects]
+    else:
+        obj_names = [names[obj] for obj in objects]
     # Set a name for the new collection. All objects have the same armature, get its type from the first.
-    comp_string = " ".join(sorted([obj.name for obj in objects]))
-    suffix = hashlib.blake2s(comp_string.encode(), digest_size=8).hexdigest()  # 16 characters.
-    skeleton = fops.get_skeleton_type(objects[0].name)
-    return "-".join(("set", skeleton, suffix))
+    suffix = _combination_suffix(tuple(sorted(obj_names)))
+    skeleton = fops.get_skeleton_type(obj_names[0])
+    return f"set-{skeleton}-{suffix}"
+
+
+@functools.lru_cache(maxsize=1024)
+def _combination_suffix(sorted_names: Tuple[str, ...]) -> str:
+    """Hash sorted object names into a 16 characters suffix. Cached, since the same combinations are named again."""
+    # Feed names one by one instead of joining them first. Same digest as hashing the space-separated names.
+    hasher = hashlib.blake2s(digest_size=8)
+    for i, name in enumerate(sorted_names):
+        if i:
+            hasher.update(b" ")
+        hasher.update(name.encode())
+    return hasher.hexdigest()
 
 
 def export_combinations(context, export_path: Union[Path, str]) -> List[tuple]:
@@ -371,14 +505,23 @@ def export_combinations(context, export_path: Union[Path, str]) -> List[tuple]:
     """
     feedback = []
     try:
-        export_collections = context.scene.collection_map[str(CollNames.EXPORT)].collection.children
+        export_collections = get_collections(context.scene)[_EXPORT].children
     except (AttributeError, KeyError):
         feedback.append(Feedback(type='ERROR', msg="Scene is not initialized properly. Missing export collection."))
         return feedback
 
+    # Resolve Blender's relative path and check for a folder once, not for every file.
+    export_path = fops.get_abs_path(export_path)
+    is_export_dir = export_path.is_dir()
+    # Selections for export don't change the active object, unset it once for all of them.
+    context.view_layer.objects.active = None
     for collection in export_collections:
+        if is_export_dir:
+            file_path = get_export_file_path(export_path, collection.name)
+        else:
+            file_path = os.fspath(export_path)
         try:
-            file_path = write_collection(collection, export_path)
+            file_path = _write_collection_file(collection, file_path, clear_active=False)
         except IOError as e:
             # Warn, an error would abort all other files as well.
             feedback.append(Feedback(type='WARNING', msg=f"Failed to export combination {collection.name}.\n{str(e)}"))
@@ -386,28 +529,33 @@ def export_combinations(context, export_path: Union[Path, str]) -> List[tuple]:
         feedback.append(Feedback(type='INFO', msg=f"Exported combination to {file_path}."))
 
     objops.deselect_all()
-    context.view_layer.objects.active = None
+    # It was already unset before exporting, and exports don't set it.
+    if context.view_layer.objects.active is not None:
+        context.view_layer.objects.active = None
     return feedback
 
 
-def write_collection(collection: bpy.types.Collection, path: Union[Path, str]) -> str:
-    """Export the objects in a collection to file.
+def get_export_file_path(folder: Path, collection_name: str) -> str:
+    """Get the path of the GLB file for a collection exported into a folder.
 
-    :param collection: Collection to export. Its name will serve as the filename if the export path points to a folder.
-    :type collection: bpy.types.Collection
-    :param path: Where to save the file. If a directory is given, the file-name will be the collection's name.
-    :type path: Union[Path, str]
-    :return: File path to exported collection. Empty on failure.
+    :param folder: Absolute path of the export folder.
+    :type folder: Path
+    :param collection_name: Name of the collection, serves as the file name.
+    :type collection_name: str
+    :return: File path for the exported collection.
     :rtype: str
     """
+    # Dots are replaced, so there's no suffix to strip. Plain string joining is cheaper than Path arithmetic.
+    return os.path.join(os.fspath(folder), collection_name.replace(".", "_") + ".glb")
+
+
+def _write_collection_file(collection: bpy.types.Collection, file_path: str, clear_active: bool = True) -> str:
+    """Export the objects in a collection to the given file path. Returns the file path, or empty on failure."""
     # Export is based on object selections and visibility.
-    objops.show_select_objects(collection.all_objects)
-    path = fops.get_abs_path(path)
-    if path.is_dir():
-        path = str((path / collection.name.replace(".", "_")).with_suffix('.glb'))
+    objops.show_select_objects(collection.all_objects, clear_active=clear_active)
     try:
-        ret = bpy.ops.export_scene.gltf(filepath=path, use_selection=True, check_existing=False)
+        ret = bpy.ops.export_scene.gltf(filepath=file_path, **GLTF_EXPORT_SETTINGS)
     except IOError:
         ret = {'CANCELLED'}
         raise
-    return path if ret != {'CANCELLED'} else ""
+    return file_path if ret != {'CANCELLED'} else ""
@@ -18,6 +18,7 @@
 
 # <pep8 compliant>
 
+import array
 from pathlib import Path
 from typing import (List,
                     Optional,
@@ -38,6 +39,30 @@ def get_materials(obj: bpy.types.Object) -> List:
     return [mat_slot.material for mat_slot in obj.material_slots]
 
 
+def get_used_materials(obj: bpy.types.Object) -> List:
+    """Get materials of the given object that are actually assigned to any of its faces.
+
+    Objects without faces, e.g. curves or meshes with only edges, get all their materials.
+
+    :param obj: Object
+    :type obj: bpy.types.Object
+    :return: Materials in use.
+    :rtype: List
+    """
+    materials = get_materials(obj)
+    try:
+        polygons = obj.data.polygons
+    except AttributeError:
+        polygons = None
+    if not polygons:
+        return [mat for mat in materials if mat]
+    # Read all material indices in a single call instead of accessing each polygon.
+    indices = array.array('i', [0]) * len(polygons)
+    polygons.foreach_get("material_index", indices)
+    used_indices = set(indices)
+    return [mat for i, mat in enumerate(materials) if mat and i in used_indices]
+
+
 def get_img_nodes(material: bpy.types.Material) -> List:
     """Get all Texture Image shader nodes in a material.
 
@@ -46,11 +71,13 @@ def get_img_nodes(material: bpy.types.Material) -> List:
     :return: Texture Image shader nodes in the material.
     :rtype: List
     """
-    return [
-        node
-        for node in material.node_tree.nodes.values()
-        if node.type == 'TEX_IMAGE'
-    ]
+    # Iterate the nodes directly, values() would build an extra list first.
+    img_nodes = []
+    append = img_nodes.append
+    for node in material.node_tree.nodes:
+        if node.type == 'TEX_IMAGE':
+            append(node)
+    return img_nodes
 
 
 def replace_img(node: bpy.types.ShaderNodeTexImage, img_path: Path):
@@ -66,10 +93,12 @@ def replace_img(node: bpy.types.ShaderNodeTexImage, img_path: Path):
     new_img = node.image.copy()
     new_img.name = bpy.path.display_name_from_filepath(str(img_path))
     new_img.filepath = str(img_path)
-    try:
-        new_img.unpack(method='REMOVE')
-    except RuntimeError:
-        pass
+    # A copy of a packed image is packed, too. Only then is there something to unpack.
+    if new_img.packed_file is not None:
+        try:
+            new_img.unpack(method='REMOVE')
+        except RuntimeError:
+            pass
     new_img.reload()
     new_img.pack()
     node.image = new_img
@@ -85,13 +114,19 @@ def get_image_paths(material: bpy.types.Material) -> List[Path]:
     """
     img_nodes = get_img_nodes(material)
     image_paths = set()
+    # Several nodes may use the same image. Resolve and check each file path only once.
+    seen_filepaths = set()
     for node in img_nodes:
         try:
-            img_path = fops.get_abs_path(node.image.filepath)
-            if img_path.is_file():
-                image_paths.add(img_path)
+            filepath = node.image.filepath
         except AttributeError:
             continue
+        if filepath in seen_filepaths:
+            continue
+        seen_filepaths.add(filepath)
+        img_path = fops.get_abs_path(filepath)
+        if img_path.is_file():
+            image_paths.add(img_path)
     return list(image_paths)
 
 
@@ -111,22 +146,23 @@ def new_material_variant(material: bpy.types.Material,
     :return: The new material or None, if no images were replaced.
     :rtype: Optional[bpy.types.Material]
     """
-    mat = material.copy()
-    mat.name = name
-    img_nodes = get_img_nodes(mat)
-    was_replaced = False
-    for node in img_nodes:
+    # Find replacements on the original first, so no copy is made if there aren't any.
+    replacements = []
+    for node in get_img_nodes(material):
         try:
             img_name = bpy.path.basename(node.image.filepath)
         except AttributeError:
             continue
         var_path = fops.find_variant_path(img_name, image_paths)
         if var_path:
-            replace_img(node, var_path)
-            was_replaced |= True
-    if not was_replaced:
-        if mat.users == 0:
-            bpy.data.materials.remove(mat)
-        del mat
+            replacements.append((node.name, var_path))
+    if not replacements:
         return None
+
+    mat = material.copy()
+    mat.name = name
+    # Node names are unique within a node tree and carry over to the copy.
+    nodes = mat.node_tree.nodes
+    for node_name, var_path in replacements:
+        replace_img(nodes[node_name], var_path)
     return mat
@@ -25,6 +25,7 @@ from typing import (Any,
                     )
 import bpy
 
+from .. import file_ops as fops
 from . import materials as mops
 from . import MESH_PREFIX
 
@@ -37,33 +38,57 @@ def traverse_tree(node: Any):
     :yield: Current node.
     :rtype: Generator
     """
-    yield node
-    for child in node.children:
-        yield from traverse_tree(child)
+    # Walk with an explicit stack instead of nested generators, one for each level of depth.
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        yield node
+        # Reverse, so children are visited in their original order.
+        stack.extend(reversed(node.children))
 
 
-def deselect_all() -> None:
-    """Deselect all objects. Use low-level API instead of relying on bpy.ops.object.select_all operator."""
-    for obj in bpy.data.objects:
-        obj.select_set(False)
+def deselect_all(view_layer: Optional[bpy.types.ViewLayer] = None) -> None:
+    """Deselect all objects. Use low-level API instead of relying on bpy.ops.object.select_all operator.
+
+    :param view_layer: View layer in which to deselect objects, defaults to the current view layer.
+    :type view_layer: Optional[bpy.types.ViewLayer], optional
+    """
+    if not view_layer:
+        view_layer = bpy.context.view_layer
+    # Selection is stored per view layer. Only visit objects that actually are selected.
+    for obj in list(view_layer.objects.selected):
+        obj.select_set(False, view_layer=view_layer)
 
 
-def show_select_objects(objects: List[bpy.types.Object], context: Optional[bpy.types.Context] = None):
+def show_select_objects(objects: List[bpy.types.Object],
+                        context: Optional[bpy.types.Context] = None,
+                        clear_active: bool = True):
     """Select given objects and deselects all others. Unhide selected objects. Disable active object.
 
     :param objects: Objects to select.
     :type objects: List[bpy.types.Object]
     :param context: Context, defaults to current context. Used to unset active object.
     :type context: Optional[bpy.types.Context], optional
+    :param clear_active: Whether to unset the active object, defaults to True.
+    Callers selecting repeatedly can unset it once themselves.
+    :type clear_active: bool, optional
     """
     deselect_all()
+    # Collections of objects, like collection.all_objects, can set a property for all items in a single call.
+    try:
+        objects.foreach_set("hide_viewport", [False] * len(objects))
+        unhide_viewport = False
+    except AttributeError:
+        unhide_viewport = True
     for obj in objects:
-        obj.hide_viewport = False
+        if unhide_viewport:
+            obj.hide_viewport = False
         obj.hide_set(False)
         obj.select_set(True)
-    if not context:
-        context = bpy.context
-    context.view_layer.objects.active = None
+    if clear_active:
+        if not context:
+            context = bpy.context
+        context.view_layer.objects.active = None
 
 
 def remove_object(obj: bpy.types.Object):
@@ -72,11 +97,8 @@ def remove_object(obj: bpy.types.Object):
     :param obj: Object to remove
     :type obj: bpy.types.Object
     """
-    for collection in list(obj.users_collection):
-        collection.objects.unlink(obj)
-    if obj.users == 0:
-        bpy.data.objects.remove(obj)
-    del obj
+    # Unlinks the object from all its users and deletes it in one go.
+    bpy.data.objects.remove(obj, do_unlink=True)
 
 
 def set_armature(obj: bpy.types.Object, armature: bpy.types.Object) -> bool:
@@ -140,7 +162,7 @@ def set_object_attributes(obj,
     except AttributeError:
         return False
     # Name materials according to their object.
-    for material in mops.get_materials(obj):  # There's usually only 1 material.
+    for material in mops.get_used_materials(obj):  # There's usually only 1 material.
         material.name = material_prefix + obj.name  # If the object has multiple materials they'll be numbered.
     return True
 
@@ -148,6 +170,10 @@ def set_object_attributes(obj,
 def new_object_variant(obj: bpy.types.Object, name: str, materials: List[bpy.types.Material]) -> bpy.types.Object:
     """Duplicate object and assign materials.
 
+    Materials are linked to the new object's slots, so it can share the mesh with the original object.
+    Only if there are more materials than slots, the mesh gets copied to hold the additional slots.
+    A shared mesh is renamed without the variant tag, since it's exported with all variants.
+
     :param obj: Object to create variant for.
     :type obj: bpy.types.Object
     :param name: Name for the new object.
@@ -159,15 +185,31 @@ def new_object_variant(obj: bpy.types.Object, name: str, materials: List[bpy.typ
     :rtype: bpy.types.Object
     """
     new_obj = obj.copy()
+    new_obj.name = name
+    material_slots = new_obj.material_slots
+    n_slots = len(material_slots)
+    if len(materials) <= n_slots:
+        # Override the mesh's materials per object instead of duplicating all the mesh data.
+        # The glTF exporter reads materials from the object's material slots, which resolve object-linked materials.
+        for slot, mat in zip(material_slots, materials):
+            slot.link = 'OBJECT'
+            slot.material = mat
+        # The mesh name ends up in exported files. Don't let it carry the variant of the first object.
+        if new_obj.type == 'MESH':
+            shared_name = MESH_PREFIX + fops.remove_name_variant(obj.name)
+            if new_obj.data.name != shared_name:
+                new_obj.data.name = shared_name
+        return new_obj
+
+    # Slots can only be added to the mesh, this variant needs a mesh of its own.
     new_data = new_obj.data.copy()
     new_data.name = MESH_PREFIX + name
     new_obj.data = new_data
-    new_obj.name = name
-    for i, mat in enumerate(materials):
-        if len(new_obj.data.materials) > i:
-            # Assign to material slot.
-            new_obj.data.materials[i] = mat
-        else:
-            # No free slot.
-            new_obj.data.materials.append(mat)
+    mesh_materials = new_data.materials
+    # Assign to material slots.
+    for i, mat in enumerate(materials[:n_slots]):
+        mesh_materials[i] = mat
+    # No free slots for the rest.
+    for mat in materials[n_slots:]:
+        mesh_materials.append(mat)
     return new_obj
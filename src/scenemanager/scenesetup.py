@@ -18,6 +18,7 @@
 
 # <pep8 compliant>
 
+import os
 from pathlib import Path
 from typing import (Optional,
                     Union,
@@ -31,6 +32,14 @@ from .. import file_ops as fops
 from .. import CollNames
 from . import objects as objops
 
+# Color tags of the initial collections.
+_INITIAL_COLOR_TAGS = ((CollNames.SOURCE, 'COLOR_05'),  # Blue.
+                       (CollNames.FAILED, 'COLOR_01'),  # Give red warning color.
+                       (CollNames.IGNORE, 'COLOR_02'),  # Orange.
+                       (CollNames.MANDATORY, 'COLOR_03'),  # Yellow.
+                       (CollNames.EXPORT, 'COLOR_04'),  # Greenlit for export.
+                       )
+
 
 def create_new_scene(scene_name: str = 'Avatar Component Combinations') -> bpy.types.Scene:
     """Create a new scene, name it, and make it active.
@@ -56,8 +65,9 @@ def link_to_parent(children: Union[bpy.types.Collection, Iterable[bpy.types.Coll
     """
     if not isinstance(children, Iterable):
         children = [children]
+    link = parent.children.link
     for child in children:
-        parent.children.link(child)
+        link(child)
 
 
 def create_initial_collections(scene: Optional[bpy.types.Scene] = None) -> Dict[str, bpy.types.Collection]:
@@ -77,11 +87,8 @@ def create_initial_collections(scene: Optional[bpy.types.Scene] = None) -> Dict[
     collections[CollNames.SOURCE].hide_render = True
     collections[CollNames.IGNORE].hide_viewport = True
     # Color them for easy identification.
-    collections[CollNames.SOURCE].color_tag = 'COLOR_05'  # Blue.
-    collections[CollNames.FAILED].color_tag = 'COLOR_01'  # Give red warning color.
-    collections[CollNames.IGNORE].color_tag = 'COLOR_02'  # Orange.
-    collections[CollNames.MANDATORY].color_tag = 'COLOR_03'  # Yellow.
-    collections[CollNames.EXPORT].color_tag = 'COLOR_04'  # Greenlit for export.
+    for name, color_tag in _INITIAL_COLOR_TAGS:
+        collections[name].color_tag = color_tag
     return collections
 
 
@@ -99,10 +106,15 @@ def create_collections(names: List[str],
     :return: Mapping of intended names to references for newly created collections.
     :rtype: Dict[str, bpy.types.Collection]
     """
-    collections = {n: bpy.data.collections.new(str(n)) for n in names}
     # If not linked to a parent, new collections will only live in Blender’s internal data.
-    if parent:
-        link_to_parent(collections.values(), parent)
+    link = parent.children.link if parent else None
+    new_collection = bpy.data.collections.new
+    collections = {}
+    for n in names:
+        collection = new_collection(str(n))
+        collections[n] = collection
+        if link:
+            link(collection)
     return collections
 
 
@@ -119,8 +131,9 @@ def objects_to_collection(objects: List[bpy.types.Object], name: str) -> bpy.typ
     """
     collection = bpy.data.collections.new(name)
     # Link object to collection.
+    link = collection.objects.link
     for obj in objects:
-        collection.objects.link(obj)
+        link(obj)
     return collection
 
 
@@ -136,31 +149,42 @@ def set_collection_map_as_property(scene: bpy.types.Scene, collection_map: Dict[
     :return: Success. Whether all collections in the mapping actually belonged to the scene.
     :rtype: bool
     """
-    # Make sure the collections in the map belong to this scene.
-    scene_collections = set(objops.traverse_tree(scene.collection))
-    is_congruent = not set(collection_map.values()) - scene_collections
-    if not is_congruent:
+    # Make sure the collections in the map belong to this scene. Stop walking the tree once all have been found.
+    unmatched = set(collection_map.values())
+    for collection in objops.traverse_tree(scene.collection):
+        if not unmatched:
+            break
+        unmatched.discard(collection)
+    if unmatched:
         return False
-    # Add scene property items.
+    # Add scene property items. Membership tests on the property are linear searches, look up existing items once.
+    existing = {item.name: item for item in scene.collection_map}
     for key, collection in collection_map.items():
+        name = str(key)
         # Overwrite any previous data with same key. Otherwise a new key with the same name is added to the property.
-        if key in scene.collection_map.keys():
-            col_map = scene.collection_map[key]
+        if name in existing:
+            col_map = existing[name]
             # ToDo: What about old collection in properties, if it's a different one?
         else:
             col_map = scene.collection_map.add()
-            col_map.name = str(key)
+            col_map.name = name
+            # Keys of different types, like CollNames and plain strings, may still map to the same name.
+            existing[name] = col_map
         col_map.collection = collection
     return True
 
 
-def set_importfiles_props(scene: Optional[bpy.types.Scene] = None, ext: str = "fbx") -> bool:
+def set_importfiles_props(scene: Optional[bpy.types.Scene] = None,
+                          ext: str = "fbx",
+                          root_path: Optional[Path] = None) -> bool:
     """Gather file-paths and determine components' category.
 
     :param scene: Scene for which to set custom import-files list property. Needs to have import_root_path property.
     :type scene: bpy.types.Scene
     :param ext: File extension of files to gather, defaults to "fbx".
     :type ext: str, optional
+    :param root_path: Already resolved absolute import root path, defaults to the scene's import_root_path.
+    :type root_path: Path, optional
     :return: Success. Whether files paths for import were set to properties.
     :rtype: bool
     """
@@ -169,17 +193,19 @@ def set_importfiles_props(scene: Optional[bpy.types.Scene] = None, ext: str = "f
     # Remove old data.
     try:
         scene.import_files.clear()
-        root_path = fops.get_abs_path(scene.import_root_path)
+        if root_path is None:
+            root_path = fops.get_abs_path(scene.import_root_path)
     except AttributeError:  # Scene does not have import_path_property. Should be set though by add-on registration.
         return False
-    file_paths = fops.get_filepaths(root_path, ext=ext)
-    if not file_paths:
-        return False  # No files to import
-    for path in file_paths:
-        import_file = scene.import_files.add()
-        import_file.path = str(path)
-        import_file.category = path.relative_to(root_path).parts[0]
-    return True
+    add_import_file = scene.import_files.add
+    # Found paths start with the root folder. Slice the category off the string instead of using relative_to.
+    root_len = len(os.path.join(os.path.abspath(root_path), ""))
+    # Walk the folders as plain strings, no Path objects are needed for the property.
+    for path in fops.iter_filepaths(root_path, ext=ext):
+        import_file = add_import_file()
+        import_file.path = path
+        import_file.category = path[root_len:].split(os.sep, 1)[0]
+    return len(scene.import_files) > 0  # No files to import?
 
 
 def init_import_scene(import_path: Union[Path, str], use_new_scene: bool = True) -> Optional[bool]:
@@ -189,10 +215,13 @@ def init_import_scene(import_path: Union[Path, str], use_new_scene: bool = True)
 
     :param import_path: Root import folder for batch-importing FBX files with avatar components.
     :type import_path: Union[Path, str]
-    :return: Success of setting scene properties for preparing file imports.
+    :return: Success of setting scene properties for preparing file imports. None if there's no file to import.
     :rtype: bool|None
     """
-    if not fops.get_abs_path(import_path).is_dir():
+    # Resolve the path once and reuse it for scanning the folder.
+    abs_import_path = fops.get_abs_path(import_path)
+    # Don't leave an empty scene behind if there's nothing to import.
+    if not abs_import_path.is_dir() or not fops.has_files(abs_import_path):
         return None
     if use_new_scene:
         scene = create_new_scene()
@@ -205,15 +234,14 @@ def init_import_scene(import_path: Union[Path, str], use_new_scene: bool = True)
         return False
     # ToDo: Merge with existing collections if not a new scene?
     init_collections = create_initial_collections(scene)
-    if not set_collection_map_as_property(scene, init_collections):
-        # Incongruency should not be possible, though, since we just linked the new collections to this scene.
-        return False
     # Create component categories.
-    categories = fops.get_subfolders(import_path)
+    categories = fops.get_subfolders(abs_import_path)
     cat_collections = create_collections(categories, parent=init_collections[CollNames.SOURCE])
-    if not set_collection_map_as_property(scene, cat_collections):  # No category collections?
+    # Map all new collections at once, so the scene's collection tree is only walked once.
+    if not set_collection_map_as_property(scene, {**init_collections, **cat_collections}):
+        # Incongruency should not be possible, though, since we just linked the new collections to this scene.
         return False
-    if not set_importfiles_props(scene):  # Scene not initialized or no files found?
+    if not set_importfiles_props(scene, root_path=abs_import_path):  # Scene not initialized or no files found?
         return False
 
     return True
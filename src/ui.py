@@ -31,34 +31,35 @@ class VIEW3D_PT_AvatarComponentCombinations(bpy.types.Panel):
 
     def draw(self, context):
         layout = self.layout
+        scene = context.scene
         col = layout.column(align=True)
         # Paths.
-        col.prop(context.scene, "import_root_path")
-        col.prop(context.scene, "export_path")
+        col.prop(scene, "import_root_path")
+        col.prop(scene, "export_path")
         # Main buttons.
         col = layout.column(align=True)
         # Import button.
         prop = col.operator("import_scene.import_avatar_components",
                             text="Import",
                             icon='IMPORT')
-        prop.import_path = context.scene.import_root_path
+        prop.import_path = scene.import_root_path
         # Combine button.
         prop = col.operator("acc.combine_avatar_components",
                             text="Combine",
                             icon='SELECT_EXTEND')
-        prop.n_combinations = context.scene.n_component_combinations
+        prop.n_combinations = scene.n_component_combinations
         # Import button.
         prop = col.operator("export_scene.export_avatar_combinations",
                             text="Export",
                             icon='EXPORT')
-        prop.export_path = context.scene.export_path
+        prop.export_path = scene.export_path
         # Settings.
         layout.separator()
         layout.label(text="Settings:")
         col = layout.column(align=True)
-        col.prop(context.scene, "use_import_texture_variants")
-        #col.prop(context.scene, "use_only_matching_sets")
-        layout.prop(context.scene, "n_component_combinations")
+        col.prop(scene, "use_import_texture_variants")
+        #col.prop(scene, "use_only_matching_sets")
+        layout.prop(scene, "n_component_combinations")
         # Auto execution.
         layout.separator()
         layout.label(text="All-in-One:")
@@ -66,6 +67,6 @@ class VIEW3D_PT_AvatarComponentCombinations(bpy.types.Panel):
         prop_import_export = layout.operator("acc.auto_export_avatars",
                                              text="Import+Export",
                                              icon='UV_SYNC_SELECT')
-        prop_import_export.import_path = context.scene.import_root_path
-        prop_import_export.export_path = context.scene.export_path
-        prop_import_export.n_combinations = context.scene.n_component_combinations
+        prop_import_export.import_path = scene.import_root_path
+        prop_import_export.export_path = scene.export_path
+        prop_import_export.n_combinations = scene.n_component_combinations